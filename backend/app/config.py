@@ -17,6 +17,8 @@ class Settings(BaseSettings):
 
     # RAG Service Configuration
     rag_service_url: str = os.getenv("RAG_SERVICE_URL", "http://rag-service:8000")
+    # Maximum number of RAG queries in flight at once; extra queries wait their turn
+    rag_max_concurrency: int = int(os.getenv("RAG_MAX_CONCURRENCY", "8"))
 
     # Database Configuration
     database_url: str = os.getenv(
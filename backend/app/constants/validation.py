@@ -17,6 +17,10 @@ MAX_MESSAGE_SIZE_BYTES = 1024 * 1024  # 1MB
 # These fields must be present in a valid SDP message
 REQUIRED_SDP_FIELDS = ["v=", "m="]
 
+# Required fields for function call messages
+# Missing fields are reported in this order
+FUNCTION_CALL_REQUIRED_FIELDS = ("type", "call_id", "function_name", "arguments")
+
 # Maximum session ID length
 # UUIDs are 36 characters, add buffer for future formats
 MAX_SESSION_ID_LENGTH = 64
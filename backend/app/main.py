@@ -100,5 +100,8 @@ async def health_check():
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=settings.backend_port)
+    # uvloop is not available on Windows, fall back to the default asyncio loop there
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn.run(app, host="0.0.0.0", port=settings.backend_port, loop=loop)
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import httpx
+import orjson
 from typing import Optional
 from app.config import settings
 
@@ -12,31 +14,36 @@ class RAGClient:
     def __init__(self):
         self.base_url = settings.rag_service_url
         self.timeout = 30.0
+        # Cap in-flight queries so concurrent sessions don't stampede the
+        # RAG service's embedding API into rate limits and timeouts
+        self._semaphore = asyncio.Semaphore(settings.rag_max_concurrency)
     
     async def query(self, query_text: str) -> Optional[dict]:
         """Query RAG service for relevant context"""
         try:
             url = f"{self.base_url}/api/rag/query"
             
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    url,
-                    json={"query": query_text}
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                logger.info(f"RAG query successful: {len(result.get('context', ''))} chars")
-                return result
+            async with self._semaphore:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.post(
+                        url,
+                        content=orjson.dumps({"query": query_text}),
+                        headers={"Content-Type": "application/json"}
+                    )
+                    response.raise_for_status()
+                    result = orjson.loads(response.content)
+            
+            logger.info("RAG query successful: %d chars", len(result.get("context", "")))
+            return result
         
         except httpx.TimeoutException:
             logger.error("RAG service timeout")
             return None
         except httpx.HTTPStatusError as e:
-            logger.error(f"RAG service HTTP error: {e.response.status_code}")
+            logger.error("RAG service HTTP error: %s", e.response.status_code)
             return None
         except Exception as e:
-            logger.error(f"Error querying RAG service: {e}", exc_info=True)
+            logger.error("Error querying RAG service: %s", e, exc_info=True)
             return None
     
     async def retrieve_context(self, query_text: str) -> str:
@@ -59,7 +66,7 @@ class RAGClient:
                 response.raise_for_status()
                 result = response.json()
                 
-                logger.info(f"RAG service health check successful: {result}")
+                logger.info("RAG service health check successful: %s", result)
                 return {
                     "status": "connected",
                     "url": self.base_url,
@@ -67,28 +74,28 @@ class RAGClient:
                 }
         
         except httpx.TimeoutException:
-            logger.warning(f"RAG service health check timeout: {self.base_url}")
+            logger.warning("RAG service health check timeout: %s", self.base_url)
             return {
                 "status": "unavailable",
                 "url": self.base_url,
                 "details": {"error": "Connection timeout"}
             }
         except httpx.ConnectError:
-            logger.warning(f"RAG service health check connection error: {self.base_url}")
+            logger.warning("RAG service health check connection error: %s", self.base_url)
             return {
                 "status": "unavailable",
                 "url": self.base_url,
                 "details": {"error": "Connection refused"}
             }
         except httpx.HTTPStatusError as e:
-            logger.warning(f"RAG service health check HTTP error: {e.response.status_code}")
+            logger.warning("RAG service health check HTTP error: %s", e.response.status_code)
             return {
                 "status": "error",
                 "url": self.base_url,
                 "details": {"error": f"HTTP {e.response.status_code}"}
             }
         except Exception as e:
-            logger.error(f"RAG service health check error: {e}", exc_info=True)
+            logger.error("RAG service health check error: %s", e, exc_info=True)
             return {
                 "status": "error",
                 "url": self.base_url,
@@ -8,6 +8,7 @@ across the backend service.
 import logging
 from typing import Dict, Any, Optional
 import httpx
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +34,7 @@ class OpenAIErrorHandler:
         """
         try:
             # Try to parse as JSON first
-            error_data = response.json()
+            error_data = orjson.loads(response.content)
 
             # Check for different error formats
             if isinstance(error_data, dict):
@@ -7,17 +7,21 @@ and prevent invalid inputs from reaching business logic.
 
 import logging
 import re
+from functools import lru_cache
 from typing import Tuple, Optional, Dict, Any
 
 from ..constants.validation import (
     MAX_SDP_SIZE_BYTES,
     REQUIRED_SDP_FIELDS,
+    FUNCTION_CALL_REQUIRED_FIELDS,
     MAX_SESSION_ID_LENGTH,
     MAX_QUERY_LENGTH,
 )
 
 logger = logging.getLogger(__name__)
 
+_FUNCTION_CALL_REQUIRED_SET = frozenset(FUNCTION_CALL_REQUIRED_FIELDS)
+
 
 def validate_sdp_format(sdp: str) -> Tuple[bool, Optional[str]]:
     """
@@ -38,9 +42,17 @@ def validate_sdp_format(sdp: str) -> Tuple[bool, Optional[str]]:
         return False, "SDP is required and must be a string"
 
     # Check SDP size
-    sdp_size = len(sdp.encode('utf-8'))
+    # Every character encodes to at least one UTF-8 byte, so the character
+    # count is a lower bound and already decides oversized SDPs. ASCII SDPs
+    # (the normal case) are exactly that size, so no encoded copy is needed.
+    sdp_size = len(sdp)
+    if sdp_size <= MAX_SDP_SIZE_BYTES and not sdp.isascii():
+        sdp_size = len(sdp.encode('utf-8'))
     if sdp_size > MAX_SDP_SIZE_BYTES:
-        return False, f"SDP size ({sdp_size} bytes) exceeds maximum ({MAX_SDP_SIZE_BYTES} bytes)"
+        # The character count may have decided the rejection; report the
+        # encoded size, which is larger for non-ASCII SDPs
+        encoded_size = sdp_size if sdp.isascii() else len(sdp.encode('utf-8'))
+        return False, f"SDP size ({encoded_size} bytes) exceeds maximum ({MAX_SDP_SIZE_BYTES} bytes)"
 
     # Check for required SDP fields
     for field in REQUIRED_SDP_FIELDS:
@@ -55,7 +67,7 @@ def validate_sdp_format(sdp: str) -> Tuple[bool, Optional[str]]:
     if 'm=' not in sdp:
         return False, "SDP must contain media description (m=)"
 
-    logger.debug(f"SDP validation passed, size: {sdp_size} bytes")
+    logger.debug("SDP validation passed, size: %d bytes", sdp_size)
     return True, None
 
 
@@ -102,39 +114,41 @@ def validate_function_call_message(message: Dict[str, Any]) -> Tuple[bool, Optio
     if not isinstance(message, dict):
         return False, "Message must be a dictionary"
 
-    # Check required fields
-    required_fields = ["type", "call_id", "function_name", "arguments"]
-    for field in required_fields:
-        if field not in message:
-            return False, f"Message missing required field: {field}"
-
-    # Validate message type
-    if message["type"] != "function_call":
-        return False, f"Invalid message type: {message['type']}"
-
-    # Validate call_id
-    if not isinstance(message["call_id"], str) or not message["call_id"]:
-        return False, "call_id must be a non-empty string"
-
-    # Validate function_name
-    if not isinstance(message["function_name"], str) or not message["function_name"]:
-        return False, "function_name must be a non-empty string"
-
-    # Validate arguments
-    if not isinstance(message["arguments"], dict):
-        return False, "arguments must be a dictionary"
+    # Check required fields with a single set difference against the keys
+    missing = _FUNCTION_CALL_REQUIRED_SET - message.keys()
+    if missing:
+        field = next(f for f in FUNCTION_CALL_REQUIRED_FIELDS if f in missing)
+        return False, f"Message missing required field: {field}"
+
+    # Validate field types with a single structural match; the well-formed
+    # shape is tried first so valid messages exit on the first case
+    match message:
+        case {
+            "type": "function_call",
+            "call_id": str(call_id),
+            "function_name": str(function_name),
+            "arguments": dict(arguments),
+        } if call_id and function_name:
+            pass
+        case {"type": message_type} if message_type != "function_call":
+            return False, f"Invalid message type: {message_type}"
+        case {"call_id": call_id} if not (isinstance(call_id, str) and call_id):
+            return False, "call_id must be a non-empty string"
+        case {"function_name": function_name} if not (isinstance(function_name, str) and function_name):
+            return False, "function_name must be a non-empty string"
+        case _:
+            return False, "arguments must be a dictionary"
 
     # For RAG function, validate query field
-    if message["function_name"] == "rag_knowledge":
-        if "query" not in message["arguments"]:
-            return False, "RAG function requires 'query' in arguments"
-
-        query = message["arguments"]["query"]
-        if not isinstance(query, str) or not query.strip():
-            return False, "RAG query must be a non-empty string"
-
-        if len(query) > MAX_QUERY_LENGTH:
-            return False, f"Query too long (max {MAX_QUERY_LENGTH} characters)"
+    if function_name == "rag_knowledge":
+        match arguments:
+            case {"query": str(query)} if query.strip():
+                if len(query) > MAX_QUERY_LENGTH:
+                    return False, f"Query too long (max {MAX_QUERY_LENGTH} characters)"
+            case {"query": _}:
+                return False, "RAG query must be a non-empty string"
+            case _:
+                return False, "RAG function requires 'query' in arguments"
 
     return True, None
 
@@ -153,8 +167,16 @@ def validate_content_type(content_type: str, expected: str) -> Tuple[bool, Optio
     if not content_type:
         return False, f"Content-Type header missing, expected: {expected}"
 
-    # Content-Type may include charset, so check if it starts with expected type
-    if not content_type.startswith(expected):
+    # Content-Type may include parameters (e.g. charset) and media types are
+    # case-insensitive, so compare only the casefolded type/subtype part
+    if not _media_type_matches(content_type, expected):
         return False, f"Invalid Content-Type: {content_type}, expected: {expected}"
 
     return True, None
+
+
+@lru_cache(maxsize=32)
+def _media_type_matches(content_type: str, expected: str) -> bool:
+    """Compare the media type of a Content-Type header against an expected type"""
+    media_type = content_type.split(";", 1)[0].strip().casefold()
+    return media_type == expected.casefold()
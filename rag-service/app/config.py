@@ -1,8 +1,11 @@
 import os
+from functools import lru_cache
+from typing import Literal
 try:
     from pydantic_settings import BaseSettings
 except ImportError:
     from pydantic import BaseSettings
+from app.constants.chromadb import BATCH_SIZE, NUM_SHARDS, WORKER_THREADS
 
 
 class Settings(BaseSettings):
@@ -14,11 +17,24 @@ class Settings(BaseSettings):
     # ChromaDB Configuration
     chromadb_host: str = os.getenv("CHROMADB_HOST", "chromadb")
     chromadb_port: int = int(os.getenv("CHROMADB_PORT", "8000"))
+    chromadb_insert_batch_size: int = int(os.getenv("CHROMADB_INSERT_BATCH_SIZE", str(BATCH_SIZE)))
+    chromadb_num_shards: int = int(os.getenv("CHROMADB_NUM_SHARDS", str(NUM_SHARDS)))
+    chromadb_worker_threads: int = int(os.getenv("CHROMADB_WORKER_THREADS", str(WORKER_THREADS)))
+    
+    # Embedding Configuration
+    # SQLite file for the persistent embedding cache; empty disables the cache
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "embeddings.cache")
+    
+    # Document Parsing Configuration
+    pdf_backend: Literal["pdfium", "pypdf2"] = os.getenv("PDF_BACKEND", "pdfium")
     
     class Config:
         env_file = ".env"
         case_sensitive = False
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, validated once on first use"""
+    return Settings()
 
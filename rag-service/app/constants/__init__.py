@@ -25,7 +25,9 @@ from .chunking import (
 from .limits import (
     MAX_FILE_SIZE_MB,
     MAX_FILE_SIZE_BYTES,
+    MAX_REQUEST_BODY_BYTES,
     EMBEDDING_REQUEST_TIMEOUT,
+    EMBEDDING_CONNECT_TIMEOUT,
     CHROMADB_REQUEST_TIMEOUT,
 )
 
@@ -47,6 +49,8 @@ __all__ = [
     # Limit constants
     'MAX_FILE_SIZE_MB',
     'MAX_FILE_SIZE_BYTES',
+    'MAX_REQUEST_BODY_BYTES',
     'EMBEDDING_REQUEST_TIMEOUT',
+    'EMBEDDING_CONNECT_TIMEOUT',
     'CHROMADB_REQUEST_TIMEOUT',
 ]
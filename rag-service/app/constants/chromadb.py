@@ -9,9 +9,32 @@ collection names, batch sizes, and similarity thresholds.
 # All documents and embeddings are stored in this collection
 COLLECTION_NAME = "knowledge_base"
 
+# Number of collection shards the knowledge base is split across
+# Each source document lands in one shard (by a stable hash of its filename),
+# bounding per-insert HNSW cost by shard size; queries fan out to all shards.
+# Changing this re-homes sources, so keep it fixed for an existing database.
+# Override with CHROMADB_NUM_SHARDS
+NUM_SHARDS = 4
+
+# HNSW index parameters applied when shard collections are created
+# Higher construction_ef and M trade slower inserts for better recall
+HNSW_SPACE = "cosine"
+HNSW_CONSTRUCTION_EF = 200
+HNSW_M = 32
+
 # Batch size for adding documents to ChromaDB
-# Larger batches improve performance but use more memory
-BATCH_SIZE = 1000
+# Client-side batching throughput plateaus around 100-250 documents per call;
+# larger batches only grow the HTTP payload. Override with CHROMADB_INSERT_BATCH_SIZE
+BATCH_SIZE = 200
+
+# Maximum number of batches inserted into ChromaDB concurrently
+# Overlaps network and HNSW indexing work across batches
+MAX_CONCURRENT_BATCHES = 4
+
+# Threads in the dedicated ChromaDB executor
+# Covers concurrent insert batches plus queries without competing with other
+# worker-thread users such as document parsing. Override with CHROMADB_WORKER_THREADS
+WORKER_THREADS = 8
 
 # Default number of results to return from similarity search
 # This can be overridden per query
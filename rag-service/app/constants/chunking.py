@@ -20,6 +20,14 @@ CHUNK_OVERLAP_TOKENS = 100
 # This is used to estimate token counts without actual tokenization
 CHARS_PER_TOKEN = 4
 
+# Number of chunks embedded and stored together during ingest
+# Bounds peak memory to one batch of chunk texts and embedding vectors
+INGEST_BATCH_CHUNKS = 200
+
+# Embedded batches buffered between the embedding and storage stages of ingest
+# Lets embedding run ahead of ChromaDB inserts without unbounded memory
+INGEST_QUEUE_BATCHES = 4
+
 # Minimum chunk size in characters
 # Chunks smaller than this are discarded as too short
 MIN_CHUNK_SIZE = 50
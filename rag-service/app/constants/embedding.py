@@ -15,10 +15,48 @@ EMBEDDING_MODEL = "text-embedding-3-small"
 # text-embedding-3-large: 3072
 EMBEDDING_DIMENSIONS = 1536
 
+# NumPy dtype of returned and cached embedding vectors
+# float16 halves memory and payload size versus float32 with negligible retrieval loss
+EMBEDDING_DTYPE = "float16"
+
 # Maximum tokens per OpenAI embedding API request
 # API limit is 8191 tokens per request for text-embedding-3-small
 MAX_TOKENS_PER_REQUEST = 8000  # Leave buffer for safety
 
 # Maximum number of texts to embed in a single batch
-# OpenAI API can handle arrays of texts, but we limit batch size
+# OpenAI API can handle arrays of texts, but we limit batch size; larger
+# inputs are split into batches of this size that are sent concurrently
 MAX_BATCH_SIZE = 100
+
+# Maximum connections in the embedding HTTP client pool
+# With HTTP/2 many requests are multiplexed over each connection
+EMBEDDING_MAX_CONNECTIONS = 64
+
+# Idle connections kept open for reuse, avoiding repeated TLS handshakes
+EMBEDDING_MAX_KEEPALIVE_CONNECTIONS = 16
+
+# Retries for failed embedding API requests (429s, 5xx, connection errors)
+# The OpenAI SDK backs off exponentially between attempts
+EMBEDDING_MAX_RETRIES = 3
+
+# Maximum number of embedding API requests in flight per generate_embeddings call
+# Overlaps round trips to OpenAI without exceeding per-key rate limits
+MAX_CONCURRENT_EMBEDDING_REQUESTS = 8
+
+# Maximum number of concurrent RAG queries embedded and searched together
+QUERY_BATCH_MAX_SIZE = 32
+
+# Time window for concurrent RAG queries to join a batch (milliseconds)
+# Short enough to be negligible next to the embedding API round trip
+QUERY_BATCH_MAX_WAIT_MS = 5
+
+# Size of the embedding cache key digest (bytes)
+# blake2b-16 over model + text; collisions are negligible at any realistic corpus size
+EMBEDDING_CACHE_KEY_BYTES = 16
+
+# Recently used embeddings kept in memory in front of the SQLite cache
+EMBEDDING_CACHE_MEMORY_ENTRIES = 10000
+
+# Maximum keys per SQLite lookup query
+# Stays below SQLite's default bound-variable limit
+EMBEDDING_CACHE_SQLITE_MAX_VARIABLES = 900
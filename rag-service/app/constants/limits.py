@@ -11,17 +11,40 @@ MAX_FILE_SIZE_MB = 50
 # Maximum file size in bytes
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 
+# Maximum request body size in bytes
+# Multipart uploads carry boundaries and headers on top of the file itself
+MAX_REQUEST_BODY_BYTES = MAX_FILE_SIZE_BYTES + 1024 * 1024
+
+# Read size when streaming uploaded files (bytes)
+# Uploads are decoded in pieces of this size instead of read whole into memory
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024  # 1 MiB
+
+# Prefix size sampled to detect the encoding of text uploads (bytes)
+ENCODING_DETECTION_BYTES = 64 * 1024  # 64 KiB
+
 # Timeout for OpenAI embedding API requests (seconds)
 # Embedding generation can take time for large batches
 EMBEDDING_REQUEST_TIMEOUT = 30
 
+# Timeout for connecting to the OpenAI embedding API (seconds)
+# Connecting should be quick even when a large batch takes a while
+EMBEDDING_CONNECT_TIMEOUT = 5
+
 # Timeout for ChromaDB operations (seconds)
 # Database operations should be fast, but network can be slow
 CHROMADB_REQUEST_TIMEOUT = 10
 
+# How long a ChromaDB health result is reused by /health (seconds)
+# Frequent load-balancer probes are answered from cache instead of re-checking
+HEALTH_CACHE_TTL_SECONDS = 5
+
 # Maximum number of concurrent document processing tasks
 MAX_CONCURRENT_UPLOADS = 5
 
+# Minimum PDF page count for parallel text extraction
+# Smaller PDFs are parsed in a single thread to avoid process IPC overhead
+PDF_PARALLEL_MIN_PAGES = 8
+
 # Maximum query length in characters
 # Prevents excessively long queries
 MAX_QUERY_LENGTH = 10000
@@ -2,15 +2,17 @@ import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.config import settings
+from app.constants.limits import MAX_REQUEST_BODY_BYTES
 from app.routes import documents, query
 from app.services.chromadb_service import chromadb_service
+from app.services.document_parser import shutdown_pdf_pool
+from app.services.embedding import embedding_service
+from app.services.query_batcher import query_batcher
+from app.utils.logging_config import setup_logging, shutdown_logging
+from app.utils.middleware import ContentSizeLimitMiddleware
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging(level="INFO")
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +24,7 @@ async def lifespan(app: FastAPI):
     logger.info("Starting RAG Service...")
     try:
         # Attempt to initialize ChromaDB, but don't fail if it's unavailable
-        chromadb_service.is_available()
+        await chromadb_service.is_available()
         logger.info("ChromaDB pre-initialization attempted")
     except Exception as e:
         logger.warning(f"ChromaDB pre-initialization failed (non-critical): {e}")
@@ -31,10 +33,19 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down RAG Service...")
+    await query_batcher.close()
+    await embedding_service.close()
+    shutdown_pdf_pool()
+    chromadb_service.shutdown()
+    shutdown_logging()
 
 
 app = FastAPI(title="RAG Service", version="1.0.0", lifespan=lifespan)
 
+# Reject oversized uploads before their body is read. Middleware added later
+# wraps it, so CORS headers are still added to its 413 responses.
+app.add_middleware(ContentSizeLimitMiddleware, max_size=MAX_REQUEST_BODY_BYTES)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -52,19 +63,8 @@ app.include_router(query.router)
 @app.get("/health")
 async def health_check():
     """Health check endpoint - works regardless of ChromaDB availability"""
-    # Get status without blocking (non-initializing check)
-    chromadb_status = chromadb_service.get_status()
-    
-    # If uninitialized, try a quick availability check (with timeout protection)
-    if chromadb_status == "uninitialized":
-        try:
-            # This will attempt initialization but has timeout protection
-            chromadb_status = "available" if chromadb_service.is_available() else "unavailable"
-        except Exception as e:
-            chromadb_status = f"unavailable: {str(e)[:50]}"
-            logger.debug(f"Health check ChromaDB status error: {e}")
-    elif chromadb_status == "initialized":
-        chromadb_status = "available"
+    # Cached for a few seconds so frequent probes don't re-check ChromaDB
+    chromadb_status = await chromadb_service.get_health_status()
     
     return {
         "status": "healthy",
@@ -1,11 +1,16 @@
+import asyncio
+import io
 import logging
 import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from app.constants.chromadb import MAX_CONCURRENT_BATCHES
+from app.constants.chunking import INGEST_BATCH_CHUNKS, INGEST_QUEUE_BATCHES
 from app.models.schemas import DocumentIngestResponse
 from app.services.document_parser import document_parser
 from app.services.embedding import embedding_service
-from app.services.chromadb_service import chromadb_service
-import uuid
+from app.services.chromadb_service import chromadb_service, chunk_document_id
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +20,127 @@ router = APIRouter(prefix="/api/documents", tags=["documents"])
 MAX_FILE_SIZE = 50 * 1024 * 1024
 
 
+def _batched(items: Iterable[Tuple[str, int]], batch_size: int) -> Iterator[List[Tuple[str, int]]]:
+    """Group an iterable into lists of up to batch_size items"""
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+async def _embed_chunk_batch(
+    filename: str,
+    batch: List[Tuple[str, int]],
+    first_index: int
+) -> Optional[Dict[str, list]]:
+    """
+    Embed the new chunks of one batch, returning add_documents arguments for them.
+    
+    Chunks whose IDs are already stored are skipped: IDs are content hashes,
+    so an unchanged chunk from a previous ingest needs no embedding or insert.
+    Returns None when the whole batch is already stored.
+    """
+    ids = [chunk_document_id(filename, chunk_id, chunk_text) for chunk_text, chunk_id in batch]
+    existing_ids = await chromadb_service.get_existing_ids(filename, ids)
+    
+    # Build the texts, metadata and IDs of the new chunks in a single pass
+    chunk_texts = []
+    metadatas = []
+    new_ids = []
+    for idx, ((chunk_text, chunk_id), doc_id) in enumerate(zip(batch, ids), first_index):
+        if doc_id in existing_ids:
+            continue
+        chunk_texts.append(chunk_text)
+        metadatas.append({
+            "source": filename,
+            "chunk_id": chunk_id,
+            "chunk_index": idx
+        })
+        new_ids.append(doc_id)
+    
+    if not new_ids:
+        logger.info(f"All {len(batch)} chunks in batch already stored; skipping")
+        return None
+    
+    embeddings = await embedding_service.generate_embeddings(chunk_texts)
+    
+    if len(embeddings) != len(chunk_texts):
+        raise HTTPException(
+            status_code=500,
+            detail=f"Embedding count mismatch: expected {len(chunk_texts)}, got {len(embeddings)}"
+        )
+    
+    return {
+        "documents": chunk_texts,
+        "embeddings": embeddings,
+        "metadatas": metadatas,
+        "ids": new_ids
+    }
+
+
+async def _ingest_chunks(filename: str, chunks: Iterable[Tuple[str, int]]) -> Tuple[int, int]:
+    """
+    Embed and store chunks batch by batch, returning (total chunks, newly stored chunks).
+    
+    Embedding and storage run as a producer and a consumer joined by a bounded
+    queue, so the next batch is embedded while the previous one is inserted;
+    the queue bound keeps at most a few embedded batches in memory. Up to
+    MAX_CONCURRENT_BATCHES batches are inserted at once, since one ingest
+    batch usually fits in a single ChromaDB insert call.
+    """
+    queue: asyncio.Queue[Optional[Dict[str, list]]] = asyncio.Queue(maxsize=INGEST_QUEUE_BATCHES)
+    total_chunks = 0
+    stored_chunks = 0
+    
+    async def produce():
+        nonlocal total_chunks
+        for batch in _batched(chunks, INGEST_BATCH_CHUNKS):
+            batch_args = await _embed_chunk_batch(filename, batch, total_chunks)
+            total_chunks += len(batch)
+            if batch_args is not None:
+                await queue.put(batch_args)
+        await queue.put(None)  # Sentinel: no more batches
+    
+    async def consume():
+        # A slot is taken before dequeuing, so batches stay in the queue
+        # (and keep back-pressure on the producer) while all slots are busy
+        slots = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+        
+        async def store(batch_args: Dict[str, list]):
+            nonlocal stored_chunks
+            try:
+                await chromadb_service.add_documents(**batch_args)
+                stored_chunks += len(batch_args["ids"])
+            finally:
+                slots.release()
+        
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                while True:
+                    await slots.acquire()
+                    batch_args = await queue.get()
+                    if batch_args is None:
+                        break
+                    task_group.create_task(store(batch_args))
+        except ExceptionGroup as group:
+            # Report the first failed insert itself, not the task group wrapper
+            raise group.exceptions[0]
+    
+    # If either side fails the other would block forever on the queue, so
+    # cancel the survivor and surface the original error
+    tasks = {asyncio.create_task(produce()), asyncio.create_task(consume())}
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    return total_chunks, stored_chunks
+
+
 @router.post("/ingest", response_model=DocumentIngestResponse)
 async def ingest_document(file: UploadFile = File(...)):
     """Ingest a document into the knowledge base"""
@@ -27,24 +153,30 @@ async def ingest_document(file: UploadFile = File(...)):
         logger.info(f"=" * 60)
         
         # Phase 1: Read file content
+        # FastAPI has already spooled the upload to a temporary file, so the
+        # parser streams from it directly instead of holding the whole file in
+        # memory; the size is taken by seeking to the end
         phase_start = time.time()
-        logger.info(f"[Phase 1/5] Reading file content...")
-        file_content = await file.read()
-        file_size = len(file_content)
-        
-        # Validate file size
+        logger.info(f"[Phase 1/3] Reading file content...")
+        file_content = file.file
+        file_content.seek(0, io.SEEK_END)
+        file_size = file_content.tell()
+        file_content.seek(0)
+        
+        # Validate file size (oversized request bodies are already rejected
+        # by ContentSizeLimitMiddleware; this enforces the exact file limit)
         if file_size > MAX_FILE_SIZE:
             raise HTTPException(
-                status_code=400,
+                status_code=413,
                 detail=f"File size ({file_size / 1024 / 1024:.2f} MB) exceeds maximum allowed size ({MAX_FILE_SIZE / 1024 / 1024} MB)"
             )
         
         phase_time = time.time() - phase_start
-        logger.info(f"[Phase 1/5] File read completed: {file_size:,} bytes ({file_size / 1024:.2f} KB) in {phase_time:.2f}s")
+        logger.info(f"[Phase 1/3] File read completed: {file_size:,} bytes ({file_size / 1024:.2f} KB) in {phase_time:.2f}s")
         
         # Phase 2: Parse document
         phase_start = time.time()
-        logger.info(f"[Phase 2/5] Parsing document...")
+        logger.info(f"[Phase 2/3] Parsing document...")
         text = await document_parser.parse_document(file_content, filename)
         
         if not text or len(text.strip()) == 0:
@@ -52,74 +184,47 @@ async def ingest_document(file: UploadFile = File(...)):
         
         phase_time = time.time() - phase_start
         text_length = len(text)
-        logger.info(f"[Phase 2/5] Document parsing completed: {text_length:,} characters extracted in {phase_time:.2f}s")
+        logger.info(f"[Phase 2/3] Document parsing completed: {text_length:,} characters extracted in {phase_time:.2f}s")
         
-        # Phase 3: Chunk text
+        # Phase 3: Chunk, embed and store in batches
+        # Chunks are generated lazily and processed a batch at a time, so peak
+        # memory is bounded by one batch of chunks and embeddings rather than
+        # growing with the document
         phase_start = time.time()
-        logger.info(f"[Phase 3/5] Chunking text...")
-        chunks = document_parser.chunk_text(text, chunk_size=500, overlap=100)
-        
-        if not chunks:
+        logger.info(f"[Phase 3/3] Chunking, embedding and storing in batches of {INGEST_BATCH_CHUNKS} chunks...")
+        # Sentence splitting and tokenizing a large document is CPU-bound, so
+        # it runs in a worker thread; only the cheap per-chunk slicing is
+        # driven from the event loop by the ingest pipeline
+        chunk_plan = await asyncio.to_thread(document_parser.prepare_chunks, text, 500)
+        chunks = document_parser.iter_prepared_chunks(chunk_plan, chunk_size=500, overlap=100)
+        total_chunks, stored_chunks = await _ingest_chunks(filename, chunks)
+        
+        if not total_chunks:
             raise HTTPException(status_code=400, detail="No chunks created from document")
         
-        phase_time = time.time() - phase_start
-        logger.info(f"[Phase 3/5] Text chunking completed: {len(chunks)} chunks created in {phase_time:.2f}s")
-        
-        # Phase 4: Generate embeddings
-        phase_start = time.time()
-        logger.info(f"[Phase 4/5] Generating embeddings...")
-        chunk_texts = [chunk[0] for chunk in chunks]
-        embeddings = await embedding_service.generate_embeddings(chunk_texts)
-        
-        if len(embeddings) != len(chunk_texts):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Embedding count mismatch: expected {len(chunk_texts)}, got {len(embeddings)}"
-            )
-        
-        phase_time = time.time() - phase_start
-        logger.info(f"[Phase 4/5] Embedding generation completed: {len(embeddings)} embeddings generated in {phase_time:.2f}s")
-        
-        # Phase 5: Store in ChromaDB
-        phase_start = time.time()
-        logger.info(f"[Phase 5/5] Storing documents in ChromaDB...")
-        
-        # Prepare metadata and IDs
-        metadatas = [
-            {
-                "source": filename,
-                "chunk_id": chunk[1],
-                "chunk_index": idx
-            }
-            for idx, chunk in enumerate(chunks)
-        ]
-        
-        ids = [f"{filename}_{chunk[1]}_{uuid.uuid4().hex[:8]}" for chunk in chunks]
-        
-        # Store in ChromaDB (now async)
-        await chromadb_service.add_documents(
-            documents=chunk_texts,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
-        
         phase_time = time.time() - phase_start
         total_time = time.time() - start_time
         
-        logger.info(f"[Phase 5/5] ChromaDB storage completed: {len(chunks)} documents stored in {phase_time:.2f}s")
+        logger.info(f"[Phase 3/3] Ingestion completed: {total_chunks} chunks, {stored_chunks} stored "
+                   f"({total_chunks - stored_chunks} already present) in {phase_time:.2f}s")
         logger.info(f"=" * 60)
         logger.info(f"Document ingestion completed successfully!")
         logger.info(f"  File: {filename}")
-        logger.info(f"  Chunks: {len(chunks)}")
+        logger.info(f"  Chunks: {total_chunks}")
         logger.info(f"  Total time: {total_time:.2f}s")
-        logger.info(f"  Average time per chunk: {total_time / len(chunks):.3f}s")
+        logger.info(f"  Average time per chunk: {total_time / total_chunks:.3f}s")
         logger.info(f"=" * 60)
         
+        if not stored_chunks:
+            return DocumentIngestResponse(
+                status="success",
+                chunks=total_chunks,
+                message=f"Document already up to date ({total_chunks} chunks) in {total_time:.2f}s"
+            )
         return DocumentIngestResponse(
             status="success",
-            chunks=len(chunks),
-            message=f"Document ingested successfully with {len(chunks)} chunks in {total_time:.2f}s"
+            chunks=total_chunks,
+            message=f"Document ingested successfully with {total_chunks} chunks in {total_time:.2f}s"
         )
     
     except HTTPException:
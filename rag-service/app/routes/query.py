@@ -1,8 +1,9 @@
+import json
 import logging
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.schemas import QueryRequest, QueryResponse
-from app.services.embedding import embedding_service
-from app.services.chromadb_service import chromadb_service
+from app.services.query_batcher import query_batcher
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +21,8 @@ async def process_query(request: QueryRequest):
         
         logger.info(f"Processing query: {query[:50]}...")
         
-        # Generate query embedding
-        query_embedding = await embedding_service.generate_embedding(query)
-        
-        # Search ChromaDB (now async)
-        results = await chromadb_service.query(
-            query_embeddings=[query_embedding],
-            n_results=5
-        )
+        # Embed and search ChromaDB, batched with concurrent queries
+        results = await query_batcher.query(query, n_results=5)
         
         # Extract documents and metadata
         documents = results.get("documents", [[]])[0]
@@ -60,3 +55,45 @@ async def process_query(request: QueryRequest):
         logger.error(f"Error processing query: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+
+@router.post("/query/stream")
+async def process_query_stream(request: QueryRequest):
+    """
+    Process a query and stream the retrieved documents as NDJSON.
+    
+    Each line is one document in rank order, so clients can start building a
+    prompt from the top results before the whole response has arrived.
+    """
+    try:
+        query = request.query.strip()
+        
+        if not query:
+            raise HTTPException(status_code=400, detail="Query cannot be empty")
+        
+        logger.info(f"Processing streaming query: {query[:50]}...")
+        
+        # Search before the response starts so failures still map to an error status
+        results = await query_batcher.query(query, n_results=5)
+        documents = results.get("documents", [[]])[0]
+        metadatas = results.get("metadatas", [[]])[0]
+        
+        logger.info(f"Streaming {len(documents)} relevant documents")
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing query: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+    
+    def iter_documents():
+        for i, doc in enumerate(documents):
+            source_info = (metadatas[i] if i < len(metadatas) else None) or {}
+            line = {
+                "rank": i + 1,
+                "source": source_info.get("source", "unknown"),
+                "text": doc,
+                "metadata": source_info
+            }
+            yield json.dumps(line).encode("utf-8") + b"\n"
+    
+    return StreamingResponse(iter_documents(), media_type="application/x-ndjson")
@@ -1,11 +1,39 @@
 import logging
 import asyncio
+import hashlib
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
 import chromadb
+import numpy as np
 from chromadb.config import Settings
-from app.config import settings
-import socket
+from chromadb.errors import NotFoundError
+from app.config import get_settings
+from app.constants.chromadb import (
+    COLLECTION_NAME,
+    HNSW_CONSTRUCTION_EF,
+    HNSW_M,
+    HNSW_SPACE,
+    MAX_CONCURRENT_BATCHES,
+    METADATA_CHUNK_ID_KEY,
+    METADATA_SOURCE_KEY,
+)
+from app.constants.limits import HEALTH_CACHE_TTL_SECONDS
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def chunk_document_id(source: str, chunk_id: int, chunk_text: str) -> str:
+    """
+    Deterministic ChromaDB ID for a chunk, derived from its source and content.
+    
+    Re-ingesting an unchanged file produces the same IDs, so the chunks are
+    recognised as already stored instead of being inserted again.
+    """
+    key = f"{source}\0{chunk_id}\0{chunk_text}".encode("utf-8")
+    return hashlib.blake2b(key, digest_size=12).hexdigest()
 
 
 class ChromaDBService:
@@ -13,51 +41,74 @@ class ChromaDBService:
     
     def __init__(self):
         self.client = None
-        self.collection = None
+        self.collections = []
         self._initialized = False
         self._initialization_error = None
+        self._init_lock = asyncio.Lock()
+        self._last_health: Optional[tuple[float, str]] = None  # (monotonic time, status)
+        # Dedicated pool for blocking ChromaDB calls, sized independently of
+        # the default executor used by asyncio.to_thread
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.chromadb_worker_threads,
+            thread_name_prefix="chroma"
+        )
     
-    def _ensure_initialized(self):
+    async def _run_in_executor(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking ChromaDB call on the dedicated executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    def shutdown(self) -> None:
+        """Shut down the ChromaDB executor, waiting for in-flight calls"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+    
+    async def _ensure_initialized(self):
         """Lazy initialization - only connect when first needed"""
         if self._initialized:
             return
         
-        if self._initialization_error:
-            raise RuntimeError(f"ChromaDB initialization failed: {self._initialization_error}")
-        
-        self._initialize()
+        # Concurrent first requests share a single initialization attempt
+        async with self._init_lock:
+            if self._initialized:
+                return
+            
+            if self._initialization_error:
+                raise RuntimeError(f"ChromaDB initialization failed: {self._initialization_error}")
+            
+            await self._initialize()
     
-    def _check_connection(self, host: str, port: int, timeout: float = 2.0) -> bool:
-        """Check if ChromaDB server is reachable"""
+    async def _check_connection(self, host: str, port: int, timeout: float = 2.0) -> bool:
+        """Check if ChromaDB server is reachable without blocking the event loop"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = sock.connect_ex((host, port))
-            sock.close()
-            return result == 0
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            writer.close()
+            await writer.wait_closed()
+            return True
         except Exception as e:
             logger.debug(f"Connection check failed: {e}")
             return False
     
-    def _initialize(self):
+    def _connect_sync(self, in_memory: bool):
+        """Synchronous helper for creating the client and shard collections"""
+        if in_memory:
+            self.client = chromadb.Client()
+        else:
+            self.client = chromadb.HttpClient(
+                host=settings.chromadb_host,
+                port=settings.chromadb_port
+            )
+        self._create_collections()
+    
+    async def _initialize(self):
         """Initialize ChromaDB client and collection"""
         try:
             # Check if ChromaDB server is reachable first (with timeout)
-            if not self._check_connection(settings.chromadb_host, settings.chromadb_port, timeout=2.0):
+            if not await self._check_connection(settings.chromadb_host, settings.chromadb_port, timeout=2.0):
                 logger.warning(f"ChromaDB server not reachable at {settings.chromadb_host}:{settings.chromadb_port}, will use in-memory client")
                 raise ConnectionError("ChromaDB server not reachable")
             
-            # Connect to ChromaDB with timeout handling
-            self.client = chromadb.HttpClient(
-                host=settings.chromadb_host,
-                port=settings.chromadb_port
-            )
-            
-            # Create or get collection
-            self.collection = self.client.get_or_create_collection(
-                name="knowledge_base",
-                metadata={"hnsw:space": "cosine"}  # Cosine similarity
-            )
+            # Connecting and creating collections make blocking HTTP calls
+            await self._run_in_executor(self._connect_sync, False)
             
             self._initialized = True
             logger.info("ChromaDB initialized successfully")
@@ -66,26 +117,104 @@ class ChromaDBService:
             logger.warning(f"Error initializing ChromaDB: {e}, falling back to in-memory client")
             # Fallback to in-memory client for development
             try:
-                self.client = chromadb.Client()
-                self.collection = self.client.get_or_create_collection(
-                    name="knowledge_base",
-                    metadata={"hnsw:space": "cosine"}
-                )
+                await self._run_in_executor(self._connect_sync, True)
                 self._initialized = True
                 logger.info("Using in-memory ChromaDB client")
             except Exception as e2:
                 logger.error(f"Error initializing in-memory ChromaDB: {e2}", exc_info=True)
                 self._initialization_error = str(e2)
                 raise
+            return
+        
+        # The server is reachable at this point, so a failed migration must
+        # not trigger the in-memory fallback above; the legacy collection is
+        # left in place and the migration is retried on the next start
+        try:
+            await self._run_in_executor(self._migrate_legacy_collection)
+        except Exception as e:
+            logger.error(f"Error migrating legacy ChromaDB collection: {e}", exc_info=True)
+    
+    def _create_collections(self):
+        """Create or get one collection per shard"""
+        self.collections = [
+            self.client.get_or_create_collection(
+                name=f"{COLLECTION_NAME}_{shard_idx}",
+                metadata={
+                    "hnsw:space": HNSW_SPACE,  # Cosine similarity
+                    "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+                    "hnsw:M": HNSW_M
+                }
+            )
+            for shard_idx in range(settings.chromadb_num_shards)
+        ]
     
-    def is_available(self) -> bool:
+    def _migrate_legacy_collection(self):
+        """
+        Move documents from the pre-sharding `knowledge_base` collection into the shards.
+        
+        Databases created before sharding hold every document in a single
+        collection that queries no longer read. On first start its records are
+        routed to their source's shard, re-keyed with content-hash IDs (which
+        also collapses duplicate copies from repeated ingests), and the legacy
+        collection is deleted once every record is copied. An interrupted
+        migration simply runs again on the next start, since upserts by
+        content-hash ID are idempotent.
+        """
+        try:
+            legacy = self.client.get_collection(COLLECTION_NAME)
+        except NotFoundError:
+            return
+        
+        total_docs = legacy.count()
+        logger.info(f"Migrating {total_docs} documents from legacy collection "
+                    f"'{COLLECTION_NAME}' into {len(self.collections)} shards...")
+        
+        batch_size = settings.chromadb_insert_batch_size
+        for offset in range(0, total_docs, batch_size):
+            records = legacy.get(
+                include=["documents", "metadatas", "embeddings"],
+                limit=batch_size,
+                offset=offset
+            )
+            by_shard: dict[int, dict[str, dict]] = {}
+            for doc_id, document, metadata, embedding in zip(
+                records["ids"], records["documents"], records["metadatas"], records["embeddings"]
+            ):
+                source = (metadata or {}).get(METADATA_SOURCE_KEY, "")
+                chunk_id = (metadata or {}).get(METADATA_CHUNK_ID_KEY)
+                if chunk_id is not None and document is not None:
+                    doc_id = chunk_document_id(source, chunk_id, document)
+                # Keyed by ID so duplicate copies within a page upsert once
+                by_shard.setdefault(self._shard_for(source), {})[doc_id] = (document, metadata, embedding)
+            
+            for shard_idx, shard_records in by_shard.items():
+                documents, metadatas, embeddings = zip(*shard_records.values())
+                self.collections[shard_idx].upsert(
+                    ids=list(shard_records),
+                    documents=list(documents),
+                    metadatas=list(metadatas),
+                    embeddings=np.asarray(embeddings)
+                )
+            logger.info(f"Migrated {min(offset + batch_size, total_docs)}/{total_docs} legacy documents")
+        
+        self.client.delete_collection(COLLECTION_NAME)
+        logger.info(f"Legacy collection '{COLLECTION_NAME}' migrated and removed")
+    
+    def _shard_for(self, source: str) -> int:
+        """Map a source document to its shard"""
+        # A cryptographic digest is stable across processes (unlike hash()) and
+        # spreads near-identical filenames evenly (unlike crc32)
+        digest = hashlib.blake2b(source.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % len(self.collections)
+    
+    async def is_available(self) -> bool:
         """Check if ChromaDB is available and initialized"""
         if not self._initialized:
             try:
-                self._ensure_initialized()
+                await self._ensure_initialized()
             except Exception:
                 return False
-        return self._initialized and self.client is not None and self.collection is not None
+        return self._initialized and self.client is not None and bool(self.collections)
     
     def get_status(self) -> str:
         """Get ChromaDB status without blocking - returns 'initialized', 'uninitialized', or 'error'"""
@@ -95,15 +224,43 @@ class ChromaDBService:
             return "initialized"
         return "uninitialized"
     
+    async def get_health_status(self) -> str:
+        """
+        Get ChromaDB status for health checks, reusing a recent result.
+        
+        Results are cached for HEALTH_CACHE_TTL_SECONDS so frequent probes do
+        not each trigger a connection attempt.
+        """
+        now = time.monotonic()
+        if self._last_health is not None and now - self._last_health[0] < HEALTH_CACHE_TTL_SECONDS:
+            return self._last_health[1]
+        
+        status = self.get_status()
+        if status == "uninitialized":
+            # Attempt initialization; the connection probe is bounded by a timeout
+            try:
+                status = "available" if await self.is_available() else "unavailable"
+            except Exception as e:
+                status = f"unavailable: {str(e)[:50]}"
+                logger.debug(f"Health check ChromaDB status error: {e}")
+        elif status == "initialized":
+            status = "available"
+        
+        self._last_health = (time.monotonic(), status)
+        return status
+    
     def _add_documents_sync(
         self,
+        shard_idx: int,
         documents: list[str],
-        embeddings: list[list[float]],
+        embeddings: np.ndarray,
         metadatas: list[dict],
         ids: list[str]
     ):
-        """Synchronous helper for adding documents"""
-        self.collection.add(
+        """Synchronous helper for adding documents to one shard"""
+        # IDs are content hashes, so an ID that is already stored carries the
+        # same chunk; add leaves the existing record as it is
+        self.collections[shard_idx].add(
             embeddings=embeddings,
             documents=documents,
             metadatas=metadatas,
@@ -113,78 +270,174 @@ class ChromaDBService:
     async def add_documents(
         self,
         documents: list[str],
-        embeddings: list[list[float]],
+        embeddings: np.ndarray,
         metadatas: list[dict],
         ids: list[str]
     ):
-        """Add documents to the collection asynchronously"""
-        self._ensure_initialized()
+        """Add documents to their source's shard asynchronously"""
+        await self._ensure_initialized()
         try:
             total_docs = len(documents)
             logger.info(f"Starting to store {total_docs} documents in ChromaDB...")
             
-            # ChromaDB can handle large batches, but we'll process in chunks for progress logging
-            # ChromaDB has a practical limit, so we'll use batches of 1000
-            batch_size = 1000
-            num_batches = (total_docs + batch_size - 1) // batch_size
+            # Route each document to the shard of its source; an ingest usually
+            # carries a single source, so hash each distinct source only once
+            shard_by_source = {
+                source: self._shard_for(source)
+                for source in {metadata.get(METADATA_SOURCE_KEY, "") for metadata in metadatas}
+            }
+            doc_shards = [shard_by_source[metadata.get(METADATA_SOURCE_KEY, "")] for metadata in metadatas]
+            if len(set(doc_shards)) > 1:
+                # Group documents by shard so every batch targets one collection
+                order = sorted(range(total_docs), key=doc_shards.__getitem__)
+                documents = [documents[i] for i in order]
+                embeddings = embeddings[order]
+                metadatas = [metadatas[i] for i in order]
+                ids = [ids[i] for i in order]
+                doc_shards = [doc_shards[i] for i in order]
             
-            for batch_idx in range(num_batches):
-                start_idx = batch_idx * batch_size
-                end_idx = min(start_idx + batch_size, total_docs)
-                
-                batch_docs = documents[start_idx:end_idx]
-                batch_embeddings = embeddings[start_idx:end_idx]
-                batch_metadatas = metadatas[start_idx:end_idx]
-                batch_ids = ids[start_idx:end_idx]
-                
-                if num_batches > 1:
-                    logger.info(f"Storing batch {batch_idx + 1}/{num_batches} "
-                              f"(documents {start_idx + 1}-{end_idx} of {total_docs})")
-                
-                # Run the blocking ChromaDB operation in a thread pool
-                await asyncio.to_thread(
-                    self._add_documents_sync,
-                    batch_docs,
-                    batch_embeddings,
-                    batch_metadatas,
-                    batch_ids
-                )
-                
-                if num_batches > 1:
+            # Small batches keep each HTTP payload light; throughput plateaus
+            # around 100-250 documents per call (see CHROMADB_INSERT_BATCH_SIZE)
+            batch_size = settings.chromadb_insert_batch_size
+            batch_ranges = []
+            run_start = 0
+            for run_end in range(1, total_docs + 1):
+                if run_end == total_docs or doc_shards[run_end] != doc_shards[run_start]:
+                    batch_ranges.extend(
+                        (doc_shards[run_start], start_idx, min(start_idx + batch_size, run_end))
+                        for start_idx in range(run_start, run_end, batch_size)
+                    )
+                    run_start = run_end
+            num_batches = len(batch_ranges)
+            
+            # Batches are independent, so several can be inserted concurrently
+            # in the thread pool; the semaphore bounds how many run at once
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+            stored_docs = 0
+            
+            async def store_batch(batch_idx: int, shard_idx: int, start_idx: int, end_idx: int):
+                nonlocal stored_docs
+                async with semaphore:
+                    if num_batches > 1:
+                        logger.info(f"Storing batch {batch_idx + 1}/{num_batches} "
+                                  f"(documents {start_idx + 1}-{end_idx} of {total_docs}, "
+                                  f"shard {shard_idx})")
+                    
+                    # Run the blocking ChromaDB operation on the dedicated executor
+                    batch_start = time.perf_counter()
+                    await self._run_in_executor(
+                        self._add_documents_sync,
+                        shard_idx,
+                        documents[start_idx:end_idx],
+                        embeddings[start_idx:end_idx],
+                        metadatas[start_idx:end_idx],
+                        ids[start_idx:end_idx]
+                    )
+                    
+                    batch_time = time.perf_counter() - batch_start
+                    batch_docs = end_idx - start_idx
+                    stored_docs += batch_docs
                     logger.info(f"Completed batch {batch_idx + 1}/{num_batches}: "
-                              f"stored {len(batch_docs)} documents "
-                              f"({end_idx}/{total_docs} total)")
+                              f"stored {batch_docs} documents in {batch_time:.2f}s "
+                              f"({batch_docs / max(batch_time, 1e-6):.0f} docs/s, "
+                              f"{stored_docs}/{total_docs} total)")
+            
+            # Collect failures instead of letting the first one cancel its siblings
+            results = await asyncio.gather(
+                *(
+                    store_batch(batch_idx, shard_idx, start_idx, end_idx)
+                    for batch_idx, (shard_idx, start_idx, end_idx) in enumerate(batch_ranges)
+                ),
+                return_exceptions=True
+            )
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                raise ExceptionGroup(
+                    f"Failed to store {len(errors)} of {num_batches} batches in ChromaDB",
+                    errors
+                )
             
             logger.info(f"Successfully stored all {total_docs} documents in ChromaDB")
         except Exception as e:
             logger.error(f"Error adding documents to ChromaDB: {e}", exc_info=True)
             raise
     
+    def _get_existing_ids_sync(self, shard_idx: int, ids: list[str]) -> set[str]:
+        """Synchronous helper for looking up which IDs are already stored in one shard"""
+        collection = self.collections[shard_idx]
+        batch_size = settings.chromadb_insert_batch_size
+        existing_ids = set()
+        for start_idx in range(0, len(ids), batch_size):
+            # include=[] fetches IDs only, without documents or embeddings
+            result = collection.get(ids=ids[start_idx:start_idx + batch_size], include=[])
+            existing_ids.update(result["ids"])
+        return existing_ids
+    
+    async def get_existing_ids(self, source: str, ids: list[str]) -> set[str]:
+        """Return the subset of a source document's chunk IDs that are already stored"""
+        await self._ensure_initialized()
+        try:
+            existing_ids = await self._run_in_executor(
+                self._get_existing_ids_sync,
+                self._shard_for(source),
+                ids
+            )
+            logger.debug(f"Found {len(existing_ids)}/{len(ids)} chunk IDs of {source} already stored")
+            return existing_ids
+        except Exception as e:
+            logger.error(f"Error looking up existing IDs in ChromaDB: {e}", exc_info=True)
+            raise
+    
     def _query_sync(
         self,
-        query_embeddings: list[list[float]],
+        shard_idx: int,
+        query_embeddings: np.ndarray,
         n_results: int = 5
     ) -> dict:
-        """Synchronous helper for querying"""
-        return self.collection.query(
+        """Synchronous helper for querying one shard"""
+        return self.collections[shard_idx].query(
             query_embeddings=query_embeddings,
             n_results=n_results
         )
     
+    @staticmethod
+    def _merge_shard_results(shard_results: list[dict], n_results: int) -> dict:
+        """Merge per-shard query results into the overall top n_results by distance"""
+        merged = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query_idx in range(len(shard_results[0]["ids"])):
+            candidates = [
+                (distance, doc_id, document, metadata)
+                for results in shard_results
+                for doc_id, document, metadata, distance in zip(
+                    results["ids"][query_idx],
+                    results["documents"][query_idx],
+                    results["metadatas"][query_idx],
+                    results["distances"][query_idx]
+                )
+            ]
+            top = heapq.nsmallest(n_results, candidates, key=lambda candidate: candidate[0])
+            merged["distances"].append([candidate[0] for candidate in top])
+            merged["ids"].append([candidate[1] for candidate in top])
+            merged["documents"].append([candidate[2] for candidate in top])
+            merged["metadatas"].append([candidate[3] for candidate in top])
+        return merged
+    
     async def query(
         self,
-        query_embeddings: list[list[float]],
+        query_embeddings: np.ndarray,
         n_results: int = 5
     ) -> dict:
-        """Query the collection for similar documents asynchronously"""
-        self._ensure_initialized()
+        """Query all shards for similar documents concurrently and merge the results"""
+        await self._ensure_initialized()
         try:
-            logger.debug(f"Querying ChromaDB for {n_results} results")
-            results = await asyncio.to_thread(
-                self._query_sync,
-                query_embeddings,
-                n_results
+            logger.debug(f"Querying {len(self.collections)} ChromaDB shards for {n_results} results")
+            shard_results = await asyncio.gather(
+                *(
+                    self._run_in_executor(self._query_sync, shard_idx, query_embeddings, n_results)
+                    for shard_idx in range(len(self.collections))
+                )
             )
+            results = self._merge_shard_results(shard_results, n_results)
             num_results = len(results.get('documents', [[]])[0])
             logger.info(f"Retrieved {num_results} results from ChromaDB")
             return results
@@ -192,15 +445,18 @@ class ChromaDBService:
             logger.error(f"Error querying ChromaDB: {e}", exc_info=True)
             raise
     
-    def get_collection_info(self) -> dict:
-        """Get collection information"""
-        if not self.is_available():
+    async def get_collection_info(self) -> dict:
+        """Get collection information, with the document count summed across shards"""
+        if not await self.is_available():
             return {"count": 0, "name": "unknown", "status": "unavailable"}
         try:
-            count = self.collection.count()
+            counts = await asyncio.gather(
+                *(self._run_in_executor(collection.count) for collection in self.collections)
+            )
             return {
-                "count": count,
-                "name": self.collection.name,
+                "count": sum(counts),
+                "name": COLLECTION_NAME,
+                "shards": len(self.collections),
                 "status": "available"
             }
         except Exception as e:
@@ -1,81 +1,296 @@
+import asyncio
+import codecs
 import logging
 import io
+import multiprocessing
+import os
 import re
-from typing import List, Tuple
-from PyPDF2 import PdfReader
-import markdown
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+import pypdfium2 as pdfium
+from charset_normalizer import from_bytes
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+from app.config import get_settings
+from app.constants.embedding import EMBEDDING_MODEL
+from app.constants.limits import (
+    ENCODING_DETECTION_BYTES,
+    PDF_PARALLEL_MIN_PAGES,
+    UPLOAD_READ_CHUNK_BYTES,
+)
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
-# Approximate token estimation: ~4 characters per token for English text
+# Approximate token estimation: ~4 characters per token for English text.
+# Only used when the tiktoken tokenizer is unavailable.
 CHARS_PER_TOKEN = 4
 
+# Sentence boundaries are found in two phases: a plain character-class scan
+# for sentence-ending punctuation (. ! ?), then the gap after each candidate is
+# checked for whitespace and a capital letter, a paragraph break, or end of
+# string. Compiled once rather than per document.
+_SENTENCE_END_RE = re.compile(r'[.!?]')
+_SENTENCE_GAP_RE = re.compile(r'\s+(?=[A-Z])|(?=\n\n)|\Z')
+
+# Runs of whitespace, collapsed to a single space when normalizing text
+_WS_RE = re.compile(r'\s+')
+
+
+class ChunkPlan(NamedTuple):
+    """Normalized text with sentence offsets and token prefix sums, ready to chunk"""
+    text: str
+    starts: List[int]      # Sentence start offsets
+    ends: List[int]        # Sentence end offsets
+    cum_tokens: List[int]  # Prefix sums of per-sentence token counts
+
+
+# Document content is either raw bytes or a readable binary file object
+# (e.g. the spooled temporary file behind a FastAPI UploadFile)
+DocumentSource = Union[bytes, BinaryIO]
+
+# Worker processes for parallel PDF page extraction, created on first use.
+# Workers are spawned rather than forked since the server process is multi-threaded.
+PDF_WORKERS = os.cpu_count() or 1
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+
+@lru_cache(maxsize=1)
+def _get_token_encoding():
+    """Return the embedding model's tiktoken encoding, or None if unavailable"""
+    if tiktoken is None:
+        logger.warning("tiktoken not installed; estimating tokens as characters / 4")
+        return None
+    try:
+        return tiktoken.encoding_for_model(EMBEDDING_MODEL)
+    except Exception as e:
+        # The BPE ranks are downloaded on first use and may be unreachable
+        logger.warning("Could not load tiktoken encoding for %s; "
+                       "estimating tokens as characters / 4: %s", EMBEDDING_MODEL, e)
+        return None
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Get the PDF worker process pool, creating it on first use"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    """Shut down the PDF worker process pool if it was started"""
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
 
 class DocumentParser:
     """Document parser for PDF, TXT, and MD files"""
     
     @staticmethod
-    async def parse_pdf(file_content: bytes) -> str:
+    def _detect_legacy_encoding(file_content: DocumentSource) -> str:
+        """Detect the encoding of content known not to be UTF-8 from a prefix of it"""
+        if isinstance(file_content, bytes):
+            sample = file_content[:ENCODING_DETECTION_BYTES]
+        else:
+            file_content.seek(0)
+            sample = file_content.read(ENCODING_DETECTION_BYTES)
+        
+        match = from_bytes(sample).best()
+        # A prefix that looks like ASCII or UTF-8 gives no hint about the bytes
+        # that failed to decode later on, so assume the common Windows codepage
+        if match is None or match.encoding in ("ascii", "utf_8"):
+            return "cp1252"
+        return match.encoding
+    
+    @staticmethod
+    def _decode(file_content: DocumentSource, encoding: str, errors: str = "strict") -> str:
+        """Decode bytes or a binary stream, reading streams incrementally"""
+        if isinstance(file_content, bytes):
+            return file_content.decode(encoding, errors)
+        
+        file_content.seek(0)
+        decoder = codecs.getincrementaldecoder(encoding)(errors)
+        parts = []
+        while chunk := file_content.read(UPLOAD_READ_CHUNK_BYTES):
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+        return "".join(parts)
+    
+    @staticmethod
+    def _load_pdf(file_content: DocumentSource, backend: str) -> Tuple[bytes, int]:
+        """Read the PDF into bytes (for shipping to worker processes) and count its pages"""
+        if isinstance(file_content, bytes):
+            pdf_bytes = file_content
+        else:
+            file_content.seek(0)
+            pdf_bytes = file_content.read()
+        
+        if backend == "pypdf2":
+            from PyPDF2 import PdfReader
+            return pdf_bytes, len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+        
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            return pdf_bytes, len(pdf)
+        finally:
+            pdf.close()
+    
+    @staticmethod
+    def _extract_pdf_pages(pdf_bytes: bytes, start: int, end: int, backend: str) -> List[str]:
+        """
+        Extract the text of pages [start, end) from a PDF.
+        
+        Runs either in a worker thread or in a worker process, so it opens
+        its own document from the raw bytes.
+        """
+        if backend == "pypdf2":
+            # Pure-Python fallback, imported only when selected
+            from PyPDF2 import PdfReader
+            reader = PdfReader(io.BytesIO(pdf_bytes))
+            return [reader.pages[page_idx].extract_text() for page_idx in range(start, end)]
+        
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            page_texts = []
+            for page_idx in range(start, end):
+                page = pdf[page_idx]
+                textpage = page.get_textpage()
+                # PDFium separates lines with CRLF
+                page_texts.append(textpage.get_text_range().replace("\r\n", "\n"))
+                textpage.close()
+                page.close()
+            return page_texts
+        finally:
+            pdf.close()
+    
+    @staticmethod
+    async def _extract_pdf_pages_parallel(pdf_bytes: bytes, total_pages: int, backend: str) -> List[str]:
+        """Extract all pages of a PDF across the worker process pool, in page order"""
+        pool = _get_pdf_pool()
+        loop = asyncio.get_running_loop()
+        
+        # One contiguous page range per worker process
+        num_workers = min(PDF_WORKERS, total_pages)
+        pages_per_worker = (total_pages + num_workers - 1) // num_workers
+        page_ranges = [
+            (start, min(start + pages_per_worker, total_pages))
+            for start in range(0, total_pages, pages_per_worker)
+        ]
+        
+        # Running totals for progress logs, so the joined text never has to be
+        # built (or re-measured) before the last page is in
+        done_pages = 0
+        total_chars = 0
+        
+        async def extract_range(start: int, end: int) -> List[str]:
+            nonlocal done_pages, total_chars
+            page_texts = await loop.run_in_executor(
+                pool,
+                DocumentParser._extract_pdf_pages,
+                pdf_bytes,
+                start,
+                end,
+                backend
+            )
+            done_pages += end - start
+            total_chars += sum(len(page_text) + 1 for page_text in page_texts)
+            logger.info("Processed pages %d-%d (%d/%d pages, %d characters extracted)",
+                        start + 1, end, done_pages, total_pages, total_chars)
+            return page_texts
+        
+        range_texts = await asyncio.gather(*(extract_range(start, end) for start, end in page_ranges))
+        return [page_text for page_texts in range_texts for page_text in page_texts]
+    
+    @staticmethod
+    async def parse_pdf(file_content: DocumentSource) -> str:
         """Parse PDF file and extract text"""
         try:
-            pdf_file = io.BytesIO(file_content)
-            reader = PdfReader(pdf_file)
-            total_pages = len(reader.pages)
-            logger.info(f"Parsing PDF with {total_pages} pages...")
+            # PDF text extraction is CPU-bound; keep it off the event loop so
+            # other requests are served during large parses
+            backend = settings.pdf_backend
+            pdf_bytes, total_pages = await asyncio.to_thread(DocumentParser._load_pdf, file_content, backend)
+            logger.info("Parsing PDF with %d pages (%s)...", total_pages, backend)
             
-            text = ""
-            for page_num, page in enumerate(reader.pages, 1):
-                page_text = page.extract_text()
-                text += page_text + "\n"
-                
-                # Log progress every 10 pages or on last page
-                if page_num % 10 == 0 or page_num == total_pages:
-                    logger.info(f"Processed {page_num}/{total_pages} pages "
-                              f"({len(text)} characters extracted)")
+            if total_pages < PDF_PARALLEL_MIN_PAGES:
+                page_texts = await asyncio.to_thread(
+                    DocumentParser._extract_pdf_pages,
+                    pdf_bytes,
+                    0,
+                    total_pages,
+                    backend
+                )
+            else:
+                # PDFium is not thread-safe (pypdfium2 serializes calls behind a
+                # lock) and PyPDF2 is pure Python, so pages are spread across
+                # processes instead
+                page_texts = await DocumentParser._extract_pdf_pages_parallel(pdf_bytes, total_pages, backend)
             
-            logger.info(f"Successfully parsed PDF: {len(text)} characters, {total_pages} pages")
+            # Join once rather than growing a str page by page, which is
+            # quadratic on large documents
+            text = "".join(f"{page_text}\n" for page_text in page_texts)
+            
+            logger.info("Successfully parsed PDF: %d characters, %d pages", len(text), total_pages)
             return text
         
         except Exception as e:
-            logger.error(f"Error parsing PDF: {e}", exc_info=True)
+            logger.error("Error parsing PDF: %s", e, exc_info=True)
             raise
     
     @staticmethod
-    async def parse_txt(file_content: bytes) -> str:
+    def _decode_text(file_content: DocumentSource) -> Tuple[str, str]:
+        """Decode text content, returning the text and the encoding used"""
+        # Fast path: pure ASCII needs no detection (and ASCII decoding is the
+        # cheapest codec); in-memory bytes can be checked up front
+        if isinstance(file_content, bytes) and file_content.isascii():
+            return file_content.decode("ascii"), "ascii"
+        
+        # Most uploads are UTF-8. Invalid input usually fails early in the
+        # decode, so only non-UTF-8 files pay for encoding detection
+        try:
+            return DocumentParser._decode(file_content, "utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            encoding = DocumentParser._detect_legacy_encoding(file_content)
+        return DocumentParser._decode(file_content, encoding, errors="replace"), encoding
+    
+    @staticmethod
+    async def parse_txt(file_content: DocumentSource) -> str:
         """Parse TXT file and extract text"""
         try:
-            text = file_content.decode('utf-8')
-            logger.info(f"Parsed TXT: {len(text)} characters")
+            text, encoding = await asyncio.to_thread(DocumentParser._decode_text, file_content)
+            logger.info("Parsed TXT (%s): %d characters", encoding, len(text))
             return text
         
-        except UnicodeDecodeError:
-            # Try with different encoding
-            try:
-                text = file_content.decode('latin-1')
-                logger.info(f"Parsed TXT (latin-1): {len(text)} characters")
-                return text
-            except Exception as e:
-                logger.error(f"Error parsing TXT: {e}", exc_info=True)
-                raise
+        except Exception as e:
+            logger.error("Error parsing TXT: %s", e, exc_info=True)
+            raise
     
     @staticmethod
-    async def parse_markdown(file_content: bytes) -> str:
+    async def parse_markdown(file_content: DocumentSource) -> str:
         """Parse Markdown file and extract text"""
         try:
-            md_text = file_content.decode('utf-8')
-            # Convert markdown to plain text (remove markdown syntax)
-            # For POC, we'll just return the raw text
-            # In production, you might want to use a markdown parser
-            text = markdown.markdown(md_text)
-            logger.info(f"Parsed Markdown: {len(text)} characters")
-            return md_text  # Return raw markdown for now
+            # The raw Markdown source is indexed as-is; it reads well as
+            # plain text, so no HTML conversion is done
+            md_text, _ = await asyncio.to_thread(DocumentParser._decode_text, file_content)
+            logger.info("Parsed Markdown: %d characters", len(md_text))
+            return md_text
         
         except Exception as e:
-            logger.error(f"Error parsing Markdown: {e}", exc_info=True)
+            logger.error("Error parsing Markdown: %s", e, exc_info=True)
             raise
     
     @staticmethod
-    async def parse_document(file_content: bytes, filename: str) -> str:
+    async def parse_document(file_content: DocumentSource, filename: str) -> str:
         """Parse document based on file extension"""
         filename_lower = filename.lower()
         
@@ -89,127 +304,238 @@ class DocumentParser:
             raise ValueError(f"Unsupported file type: {filename}")
     
     @staticmethod
-    def _estimate_tokens(text: str) -> int:
-        """Estimate token count (approximate: ~4 chars per token)"""
-        return len(text) // CHARS_PER_TOKEN
+    def _sentence_token_counts(text: str, spans: np.ndarray) -> np.ndarray:
+        """Count the tokens of each sentence span of text"""
+        encoding = _get_token_encoding()
+        if encoding is None:
+            return (spans[:, 1] - spans[:, 0]) // CHARS_PER_TOKEN
+        # encode_ordinary_batch tokenizes in tiktoken's native thread pool
+        sentences = [text[start:end] for start, end in spans.tolist()]
+        return np.fromiter(
+            map(len, encoding.encode_ordinary_batch(sentences)),
+            dtype=np.int64,
+            count=len(sentences)
+        )
     
     @staticmethod
-    def _split_into_sentences(text: str) -> List[str]:
-        """Split text into sentences using regex"""
-        # Pattern to match sentence endings (. ! ?) followed by whitespace or end of string
-        # Handles common abbreviations and decimal numbers
-        sentence_pattern = r'(?<=[.!?])\s+(?=[A-Z])|(?<=[.!?])(?=\n\n)|(?<=[.!?])(?=\Z)'
-        sentences = re.split(sentence_pattern, text)
+    def _sentence_spans(text: str) -> List[Tuple[int, int]]:
+        """
+        Find sentence boundaries as (start, end) offsets into whitespace-normalized text.
         
-        # Filter out empty sentences and clean up
-        sentences = [s.strip() for s in sentences if s.strip()]
-        return sentences
+        Sentences are sliced from the original string on demand instead of
+        being materialized as a list of strings.
+        """
+        spans = []
+        start = 0
+        gap_match = _SENTENCE_GAP_RE.match
+        for end_match in _SENTENCE_END_RE.finditer(text):
+            # Only punctuation positions are tested for a boundary, instead of
+            # running lookbehinds at every character of the document
+            gap = gap_match(text, end_match.end())
+            if gap is None:
+                continue
+            if gap.start() > start:
+                spans.append((start, gap.start()))
+            start = gap.end()
+        if start < len(text):
+            spans.append((start, len(text)))
+        return spans
     
     @staticmethod
-    def chunk_text(
-        text: str,
-        chunk_size: int = 500,
-        overlap: int = 100
-    ) -> List[Tuple[str, int]]:
+    def _fits_single_chunk(text: str, chunk_size: int) -> bool:
         """
-        Chunk text into smaller pieces with overlap, respecting sentence boundaries.
+        Cheaply decide that text fits in one chunk, without splitting or tokenizing it.
+        
+        A BPE token always covers at least one UTF-8 byte, so text of at most
+        chunk_size bytes cannot exceed chunk_size tokens. Without tiktoken the
+        ~4 chars per token estimate is already O(1).
+        """
+        if _get_token_encoding() is None:
+            return len(text) // CHARS_PER_TOKEN <= chunk_size
+        return len(text) <= chunk_size and (text.isascii() or len(text.encode("utf-8")) <= chunk_size)
+    
+    @staticmethod
+    def prepare_chunks(text: str, chunk_size: int = 500) -> ChunkPlan:
+        """
+        Normalize text, split it into sentences and count their tokens.
+        
+        This is the CPU-heavy part of chunking (a regex pass and a full
+        tokenizer pass over the document), so async callers should run it in
+        a worker thread and then iterate the plan with iter_prepared_chunks.
         
         Args:
             text: Text to chunk
-            chunk_size: Target chunk size in tokens (approximate)
-            overlap: Overlap size in tokens (approximate)
+            chunk_size: Target chunk size in tokens
         
         Returns:
-            List of tuples (chunk_text, chunk_id)
+            A ChunkPlan; its sentence lists are empty when the whole text is
+            a single chunk (or empty)
         """
         # Clean and normalize text
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = _WS_RE.sub(' ', text.strip())
         
         if not text:
             logger.warning("Empty text provided for chunking")
-            return []
+            return ChunkPlan(text, [], [], [])
+        
+        # Short texts are emitted whole before any sentence or token work
+        if DocumentParser._fits_single_chunk(text, chunk_size):
+            logger.info("Text fits in single chunk, no chunking needed")
+            return ChunkPlan(text, [], [], [])
         
-        # Estimate total tokens
-        total_tokens = DocumentParser._estimate_tokens(text)
-        logger.info(f"Chunking text: {len(text)} characters, ~{total_tokens} tokens "
-                   f"(target chunk size: {chunk_size} tokens, overlap: {overlap} tokens)")
+        # Split into sentences for sentence-aware chunking. Sentences in the
+        # normalized text are separated by single spaces, so a run of sentences
+        # is a plain slice of the text from its first start to its last end.
+        spans = np.array(DocumentParser._sentence_spans(text), dtype=np.int64).reshape(-1, 2)
+        
+        # Prefix sums of per-sentence token counts: the tokens in sentences
+        # [lo, hi) are cum_tokens[hi] - cum_tokens[lo], so each chunk's end is
+        # found with one binary search instead of a per-sentence Python loop.
+        # Each sentence is tokenized once; the document total is the last sum.
+        sentence_tokens = DocumentParser._sentence_token_counts(text, spans)
+        cum_tokens = np.concatenate(([0], np.cumsum(sentence_tokens)))
+        total_tokens = int(cum_tokens[-1])
+        logger.info("Chunking text: %d characters, ~%d tokens (target chunk size: %d tokens)",
+                    len(text), total_tokens, chunk_size)
         
         # If text is smaller than chunk size, return as single chunk
         if total_tokens <= chunk_size:
             logger.info("Text fits in single chunk, no chunking needed")
-            return [(text, 0)]
+            return ChunkPlan(text, [], [], [])
+        
+        logger.info("Split text into %d sentences", len(spans))
+        
+        # The chunk loop does a few scalar lookups and binary searches per
+        # chunk; on plain lists with bisect those skip NumPy's per-call and
+        # scalar-boxing overhead
+        return ChunkPlan(text, spans[:, 0].tolist(), spans[:, 1].tolist(), cum_tokens.tolist())
+    
+    @staticmethod
+    def iter_prepared_chunks(
+        plan: ChunkPlan,
+        chunk_size: int = 500,
+        overlap: int = 100
+    ) -> Iterator[Tuple[str, int]]:
+        """
+        Lazily chunk a prepared text into pieces with overlap, respecting sentence boundaries.
+        
+        Only binary searches over the precomputed prefix sums run per chunk,
+        so this is cheap enough to drive from the event loop.
+        
+        Args:
+            plan: Result of prepare_chunks for the same chunk_size
+            chunk_size: Target chunk size in tokens
+            overlap: Overlap size in tokens
         
-        # Split into sentences for sentence-aware chunking
-        sentences = DocumentParser._split_into_sentences(text)
-        logger.info(f"Split text into {len(sentences)} sentences")
+        Yields:
+            Tuples (chunk_text, chunk_id)
+        """
+        text, starts, ends, cum = plan
+        if not starts:
+            if text:
+                yield text, 0
+            return
         
-        chunks = []
+        num_sentences = len(starts)
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         chunk_id = 0
-        current_chunk_sentences = []
-        current_chunk_tokens = 0
+        chunk_start = 0      # Index of the first sentence in the current chunk
+        carried = 0          # Number of overlap sentences carried from the previous chunk
         
-        i = 0
-        while i < len(sentences):
-            sentence = sentences[i]
-            sentence_tokens = DocumentParser._estimate_tokens(sentence)
+        # Chunk size statistics, kept as chunks are emitted
+        num_chunks = 0
+        sum_tokens = 0
+        min_tokens = cum[-1]
+        max_tokens = 0
+        
+        while chunk_start < num_sentences:
+            # Extend the chunk with as many sentences as fit in chunk_size;
+            # carried overlap sentences and at least one sentence are always kept
+            chunk_end = bisect_right(cum, cum[chunk_start] + chunk_size) - 1
+            chunk_end = min(max(chunk_end, chunk_start + max(carried, 1)), num_sentences)
             
-            # If adding this sentence would exceed chunk size, finalize current chunk
-            if current_chunk_tokens + sentence_tokens > chunk_size and current_chunk_sentences:
-                # Create chunk from accumulated sentences
-                chunk_text = " ".join(current_chunk_sentences)
-                chunks.append((chunk_text, chunk_id))
-                logger.debug(f"Created chunk {chunk_id}: ~{current_chunk_tokens} tokens, "
-                           f"{len(current_chunk_sentences)} sentences")
-                
-                chunk_id += 1
-                
-                # Start new chunk with overlap
-                # Go back to include overlap sentences
-                overlap_tokens = 0
-                overlap_sentences = []
-                j = len(current_chunk_sentences) - 1
-                
-                while j >= 0 and overlap_tokens < overlap:
-                    prev_sentence = current_chunk_sentences[j]
-                    prev_tokens = DocumentParser._estimate_tokens(prev_sentence)
-                    if overlap_tokens + prev_tokens <= overlap:
-                        overlap_sentences.insert(0, prev_sentence)
-                        overlap_tokens += prev_tokens
-                        j -= 1
-                    else:
-                        break
-                
-                current_chunk_sentences = overlap_sentences
-                current_chunk_tokens = overlap_tokens
-                
-                # Don't increment i, process current sentence again
+            if carried and chunk_end == chunk_start + carried:
+                # The chunk holds nothing but the overlap carried from the
+                # previous chunk; drop it instead of emitting it again so
+                # long sentences always make progress
+                chunk_start = chunk_end
+                carried = 0
                 continue
             
-            # Add sentence to current chunk
-            current_chunk_sentences.append(sentence)
-            current_chunk_tokens += sentence_tokens
-            i += 1
-        
-        # Add final chunk if there are remaining sentences
-        if current_chunk_sentences:
-            chunk_text = " ".join(current_chunk_sentences)
-            chunks.append((chunk_text, chunk_id))
-            logger.debug(f"Created final chunk {chunk_id}: ~{current_chunk_tokens} tokens, "
-                       f"{len(current_chunk_sentences)} sentences")
-        
-        # Log chunk statistics
-        if chunks:
-            chunk_sizes = [DocumentParser._estimate_tokens(chunk[0]) for chunk in chunks]
-            avg_size = sum(chunk_sizes) / len(chunk_sizes)
-            min_size = min(chunk_sizes)
-            max_size = max(chunk_sizes)
+            # Create chunk from accumulated sentences
+            current_chunk_tokens = cum[chunk_end] - cum[chunk_start]
+            num_chunks += 1
+            sum_tokens += current_chunk_tokens
+            min_tokens = min(min_tokens, current_chunk_tokens)
+            max_tokens = max(max_tokens, current_chunk_tokens)
+            if debug_enabled:
+                logger.debug("Created chunk %d: ~%d tokens, %d sentences",
+                             chunk_id, current_chunk_tokens, chunk_end - chunk_start)
+            yield text[starts[chunk_start]:ends[chunk_end - 1]], chunk_id
+            
+            if chunk_end == num_sentences:
+                break
             
-            logger.info(f"Successfully chunked text into {len(chunks)} chunks: "
-                       f"avg ~{avg_size:.0f} tokens, "
-                       f"min ~{min_size} tokens, "
-                       f"max ~{max_size} tokens")
+            chunk_id += 1
+            
+            # Start new chunk with overlap: carry back the trailing sentences
+            # whose tokens fit within `overlap`, stopping as soon as the overlap
+            # is filled exactly. With target = cum[chunk_end] - overlap, that is
+            # the last index whose prefix sum equals the target, or else the
+            # first index whose prefix sum exceeds it.
+            target = cum[chunk_end] - overlap
+            next_start = max(bisect_right(cum, target) - 1, bisect_left(cum, target))
+            next_start = min(max(next_start, chunk_start), chunk_end)
+            
+            carried = chunk_end - next_start
+            chunk_start = next_start
         
-        return chunks
+        logger.info("Successfully chunked text into %d chunks: "
+                    "avg ~%.0f tokens, min ~%d tokens, max ~%d tokens",
+                    num_chunks, sum_tokens / num_chunks, min_tokens, max_tokens)
+    
+    @staticmethod
+    def iter_chunks(
+        text: str,
+        chunk_size: int = 500,
+        overlap: int = 100
+    ) -> Iterator[Tuple[str, int]]:
+        """
+        Lazily chunk text into smaller pieces with overlap, respecting sentence boundaries.
+        
+        Chunks are produced one at a time, so callers can embed and store them
+        in batches without holding every chunk of a large document at once.
+        
+        Args:
+            text: Text to chunk
+            chunk_size: Target chunk size in tokens
+            overlap: Overlap size in tokens
+        
+        Yields:
+            Tuples (chunk_text, chunk_id)
+        """
+        yield from DocumentParser.iter_prepared_chunks(
+            DocumentParser.prepare_chunks(text, chunk_size), chunk_size, overlap
+        )
+    
+    @staticmethod
+    def chunk_text(
+        text: str,
+        chunk_size: int = 500,
+        overlap: int = 100
+    ) -> List[Tuple[str, int]]:
+        """
+        Chunk text into smaller pieces with overlap, respecting sentence boundaries.
+        
+        Args:
+            text: Text to chunk
+            chunk_size: Target chunk size in tokens
+            overlap: Overlap size in tokens
+        
+        Returns:
+            List of tuples (chunk_text, chunk_id)
+        """
+        return list(DocumentParser.iter_chunks(text, chunk_size, overlap))
 
 
 # Global document parser instance
@@ -1,87 +1,206 @@
 import logging
 import asyncio
+import base64
 from typing import List
-from openai import OpenAI
-from app.config import settings
+import httpx
+import numpy as np
+from openai import AsyncOpenAI
+from app.config import get_settings
+from app.constants.embedding import (
+    EMBEDDING_DIMENSIONS,
+    EMBEDDING_DTYPE,
+    EMBEDDING_MAX_CONNECTIONS,
+    EMBEDDING_MAX_KEEPALIVE_CONNECTIONS,
+    EMBEDDING_MAX_RETRIES,
+    MAX_BATCH_SIZE,
+    MAX_CONCURRENT_EMBEDDING_REQUESTS,
+)
+from app.constants.limits import EMBEDDING_CONNECT_TIMEOUT, EMBEDDING_REQUEST_TIMEOUT
+from app.services.embedding_cache import EmbeddingCache
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
-# Batch size limit for OpenAI API (max 2048 inputs per request)
-MAX_BATCH_SIZE = 2048
+# Element type of base64-encoded embeddings returned by the API
+API_EMBEDDING_DTYPE = np.dtype("<f4")
 
 
 class EmbeddingService:
-    """Service for generating embeddings using OpenAI API"""
+    """
+    Service for generating embeddings using OpenAI API.
+    
+    Embeddings are returned as NumPy arrays of EMBEDDING_DTYPE: one row per
+    text from generate_embeddings, a single vector from generate_embedding.
+    """
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        # Native async client: requests are multiplexed on the event loop
+        # (over HTTP/2) instead of each occupying a worker thread. The one
+        # client and its keep-alive pool are shared for the process lifetime.
+        timeout = httpx.Timeout(EMBEDDING_REQUEST_TIMEOUT, connect=EMBEDDING_CONNECT_TIMEOUT)
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=timeout,
+            # Transient failures are retried per request, so one 429 does not
+            # fail (and force a re-embed of) the whole document
+            max_retries=EMBEDDING_MAX_RETRIES,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=EMBEDDING_MAX_CONNECTIONS,
+                    max_keepalive_connections=EMBEDDING_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+        )
         self.model = "text-embedding-3-small"  # Using smaller model for POC
+        self.cache = EmbeddingCache(settings.embedding_cache_path) if settings.embedding_cache_path else None
     
-    def _generate_embedding_sync(self, text: str) -> List[float]:
-        """Synchronous helper for generating a single embedding"""
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=text
-        )
-        return response.data[0].embedding
+    @staticmethod
+    def _from_cache_value(value: bytes) -> np.ndarray:
+        """View a cached embedding's raw bytes as a vector"""
+        return np.frombuffer(value, dtype=EMBEDDING_DTYPE)
     
-    def _generate_embeddings_batch_sync(self, texts: List[str]) -> List[List[float]]:
-        """Synchronous helper for generating embeddings in batch"""
-        response = self.client.embeddings.create(
+    async def _generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings for one batch with a single API request"""
+        # base64 embeddings are raw little-endian float32 buffers; decoding
+        # them straight into one preallocated array never creates a Python
+        # float object per dimension
+        response = await self.client.embeddings.create(
             model=self.model,
-            input=texts
+            input=texts,
+            encoding_format="base64"
         )
-        return [item.embedding for item in response.data]
+        # Sized from the first decoded row, since the model may return a
+        # different dimension than EMBEDDING_DIMENSIONS
+        embeddings = np.empty((0, EMBEDDING_DIMENSIONS), dtype=EMBEDDING_DTYPE)
+        for item in response.data:
+            row = np.frombuffer(base64.b64decode(item.embedding), dtype=API_EMBEDDING_DTYPE)
+            if not len(embeddings):
+                embeddings = np.empty((len(response.data), len(row)), dtype=EMBEDDING_DTYPE)
+            embeddings[item.index] = row
+        return embeddings
     
-    async def generate_embedding(self, text: str) -> List[float]:
-        """Generate embedding for a single text"""
+    async def generate_embedding(self, text: str, use_cache: bool = True) -> np.ndarray:
+        """
+        Generate embedding for a single text.
+        
+        use_cache=False bypasses the persistent cache, for one-off texts such
+        as user queries that should be neither looked up nor stored.
+        """
         try:
-            logger.debug(f"Generating embedding for text: {len(text)} chars")
-            embedding = await asyncio.to_thread(self._generate_embedding_sync, text)
-            logger.debug(f"Successfully generated embedding: {len(embedding)} dimensions")
+            logger.debug("Generating embedding for text: %d chars", len(text))
+            use_cache = use_cache and self.cache is not None
+            if use_cache:
+                key = EmbeddingCache.make_key(self.model, text)
+                cached = await self.cache.get_many([key])
+                if key in cached:
+                    logger.debug("Embedding cache hit")
+                    return self._from_cache_value(cached[key])
+            
+            embeddings = await self._generate_embeddings_batch([text])
+            if not len(embeddings):
+                raise ValueError("Embedding API returned no embedding")
+            embedding = embeddings[0]
+            logger.debug("Successfully generated embedding: %d dimensions", len(embedding))
+            
+            if use_cache:
+                await self.cache.put_many({key: embedding.tobytes()})
             return embedding
         
         except Exception as e:
-            logger.error(f"Error generating embedding: {e}", exc_info=True)
+            logger.error("Error generating embedding: %s", e, exc_info=True)
             raise
     
-    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts with progress logging and batching"""
+    async def _embed_uncached(self, texts: List[str]) -> np.ndarray:
+        """Embed texts through the API in concurrent batches, in input order"""
+        total_texts = len(texts)
+        
+        # Process in batches to avoid API limits and provide progress updates
+        batch_size = min(MAX_BATCH_SIZE, total_texts)
+        batch_ranges = [
+            (start_idx, min(start_idx + batch_size, total_texts))
+            for start_idx in range(0, total_texts, batch_size)
+        ]
+        num_batches = len(batch_ranges)
+        
+        # Batches are independent API calls, so their round trips overlap;
+        # the semaphore bounds how many are in flight at once
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_EMBEDDING_REQUESTS)
+        completed_texts = 0
+        
+        async def embed_batch(batch_idx: int, start_idx: int, end_idx: int) -> np.ndarray:
+            nonlocal completed_texts
+            async with semaphore:
+                logger.info("Processing embedding batch %d/%d (chunks %d-%d of %d)",
+                            batch_idx + 1, num_batches, start_idx + 1, end_idx, total_texts)
+                
+                batch_embeddings = await self._generate_embeddings_batch(texts[start_idx:end_idx])
+                
+                completed_texts += len(batch_embeddings)
+                logger.info("Completed batch %d/%d: generated %d embeddings (%d/%d total)",
+                            batch_idx + 1, num_batches, len(batch_embeddings),
+                            completed_texts, total_texts)
+                return batch_embeddings
+        
+        # gather preserves batch order, so embeddings line up with texts
+        batch_results = await asyncio.gather(
+            *(
+                embed_batch(batch_idx, start_idx, end_idx)
+                for batch_idx, (start_idx, end_idx) in enumerate(batch_ranges)
+            )
+        )
+        return np.concatenate(batch_results)
+    
+    async def generate_embeddings(self, texts: List[str], use_cache: bool = True) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts with progress logging and batching.
+        
+        use_cache=False bypasses the persistent cache, for one-off texts such
+        as user queries that should be neither looked up nor stored.
+        """
         try:
             total_texts = len(texts)
-            logger.info(f"Starting embedding generation for {total_texts} texts using model: {self.model}")
+            logger.info("Starting embedding generation for %d texts using model: %s", total_texts, self.model)
             
-            all_embeddings = []
+            if not texts:
+                return np.empty((0, EMBEDDING_DIMENSIONS), dtype=EMBEDDING_DTYPE)
             
-            # Process in batches to avoid API limits and provide progress updates
-            batch_size = min(MAX_BATCH_SIZE, total_texts)
-            num_batches = (total_texts + batch_size - 1) // batch_size
+            if not use_cache or self.cache is None:
+                all_embeddings = await self._embed_uncached(texts)
+                logger.info("Successfully generated all %d embeddings", len(all_embeddings))
+                return all_embeddings
             
-            for batch_idx in range(num_batches):
-                start_idx = batch_idx * batch_size
-                end_idx = min(start_idx + batch_size, total_texts)
-                batch_texts = texts[start_idx:end_idx]
-                
-                logger.info(f"Processing embedding batch {batch_idx + 1}/{num_batches} "
-                          f"(chunks {start_idx + 1}-{end_idx} of {total_texts})")
-                
-                # Run the blocking API call in a thread pool
-                batch_embeddings = await asyncio.to_thread(
-                    self._generate_embeddings_batch_sync,
-                    batch_texts
-                )
-                
-                all_embeddings.extend(batch_embeddings)
-                logger.info(f"Completed batch {batch_idx + 1}/{num_batches}: "
-                          f"generated {len(batch_embeddings)} embeddings "
-                          f"({len(all_embeddings)}/{total_texts} total)")
+            # Only texts missing from the cache go to the API, each distinct text once
+            keys = [EmbeddingCache.make_key(self.model, text) for text in texts]
+            values = await self.cache.get_many(keys)
+            misses = {key: text for key, text in zip(keys, texts) if key not in values}
+            logger.info("Embedding cache: %d hits, %d to generate", total_texts - len(misses), len(misses))
             
-            logger.info(f"Successfully generated all {len(all_embeddings)} embeddings")
+            if misses:
+                new_embeddings = await self._embed_uncached(list(misses.values()))
+                new_values = {key: embedding.tobytes() for key, embedding in zip(misses, new_embeddings)}
+                await self.cache.put_many(new_values)
+                values.update(new_values)
+            
+            # Fill one preallocated array from the cached buffers
+            dimensions = len(next(iter(values.values()))) // np.dtype(EMBEDDING_DTYPE).itemsize
+            all_embeddings = np.empty((total_texts, dimensions), dtype=EMBEDDING_DTYPE)
+            for row, key in enumerate(keys):
+                all_embeddings[row] = self._from_cache_value(values[key])
+            
+            logger.info("Successfully generated all %d embeddings", len(all_embeddings))
             return all_embeddings
         
         except Exception as e:
-            logger.error(f"Error generating embeddings: {e}", exc_info=True)
+            logger.error("Error generating embeddings: %s", e, exc_info=True)
             raise
+    
+    async def close(self):
+        """Close the HTTP connection pool and the embedding cache"""
+        await self.client.close()
+        if self.cache is not None:
+            self.cache.close()
 
 
 # Global embedding service instance
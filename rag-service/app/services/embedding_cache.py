@@ -0,0 +1,108 @@
+import logging
+import sqlite3
+import hashlib
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from app.constants.embedding import (
+    EMBEDDING_CACHE_KEY_BYTES,
+    EMBEDDING_CACHE_MEMORY_ENTRIES,
+    EMBEDDING_CACHE_SQLITE_MAX_VARIABLES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by a hash of model and text.
+
+    Vectors are stored as raw float16 bytes in SQLite so re-ingesting the
+    same content never calls the embedding API twice, even across restarts.
+    Recently used entries are also kept in an in-memory LRU in front of SQLite.
+    """
+
+    def __init__(self, path: str, memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self._memory: OrderedDict[bytes, bytes] = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        # SQLite calls run in worker threads; one connection is shared under a lock
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> bytes:
+        """Cache key for an embedding of text by model"""
+        return hashlib.blake2b(
+            f"{model}\0{text}".encode("utf-8"),
+            digest_size=EMBEDDING_CACHE_KEY_BYTES
+        ).digest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS emb (k BLOB PRIMARY KEY, v BLOB NOT NULL)")
+            logger.info(f"Opened embedding cache at {self.path}")
+        return self._conn
+
+    def _remember(self, key: bytes, value: bytes):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _get_many_sync(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        found: Dict[bytes, bytes] = {}
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                value = self._memory.get(key)
+                if value is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = value
+
+            if missing:
+                conn = self._connect()
+                for start in range(0, len(missing), EMBEDDING_CACHE_SQLITE_MAX_VARIABLES):
+                    chunk = missing[start:start + EMBEDDING_CACHE_SQLITE_MAX_VARIABLES]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = conn.execute(f"SELECT k, v FROM emb WHERE k IN ({placeholders})", chunk)
+                    for key, value in rows:
+                        found[key] = value
+                        self._remember(key, value)
+        return found
+
+    def _put_many_sync(self, items: Dict[bytes, bytes]):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany("INSERT OR REPLACE INTO emb (k, v) VALUES (?, ?)", items.items())
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            for key, value in items.items():
+                self._remember(key, value)
+
+    async def get_many(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        """Look up cached vectors; returns only the keys that were found"""
+        if not keys:
+            return {}
+        return await asyncio.to_thread(self._get_many_sync, keys)
+
+    async def put_many(self, items: Dict[bytes, bytes]):
+        """Store vectors in the cache"""
+        if items:
+            await asyncio.to_thread(self._put_many_sync, items)
+
+    def close(self):
+        """Close the SQLite connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,115 @@
+import logging
+import asyncio
+from typing import Optional
+from app.constants.embedding import QUERY_BATCH_MAX_SIZE, QUERY_BATCH_MAX_WAIT_MS
+from app.services.embedding import embedding_service
+from app.services.chromadb_service import chromadb_service
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent RAG queries into batched embedding and search calls.
+
+    Queries arriving within a few milliseconds of each other are embedded with
+    a single API call and searched with a single ChromaDB query, then each
+    caller receives its own results.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = QUERY_BATCH_MAX_SIZE,
+        max_wait_ms: float = QUERY_BATCH_MAX_WAIT_MS
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    def _ensure_started(self):
+        """Start the batching task on first use, inside the running event loop"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def query(self, query: str, n_results: int = 5) -> dict:
+        """Embed and search a single query as part of the next batch"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, n_results, future))
+        return await future
+
+    async def _run(self):
+        """Collect queued queries into batches and dispatch each batch"""
+        while True:
+            batch = [await self._queue.get()]
+
+            # Give concurrent queries a short window to join the batch,
+            # unless enough are already waiting to fill it
+            if self._queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Process batches concurrently so collection of the next batch
+            # is not held up by the embedding API round trip
+            task = asyncio.create_task(self._process_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _process_batch(self, batch: list[tuple[str, int, asyncio.Future]]):
+        """Embed and search one batch, then resolve each caller's future"""
+        # Callers that went away (e.g. disconnected clients) need no work
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+
+        try:
+            logger.debug(f"Processing query batch of {len(batch)}")
+            # Queries skip the embedding cache: a disk write per query would add
+            # latency, and user query text should not be persisted
+            embeddings = await embedding_service.generate_embeddings(
+                [query for query, _, _ in batch],
+                use_cache=False
+            )
+
+            # Queries sharing n_results are searched together in one call
+            by_n_results: dict[int, list[int]] = {}
+            for idx, (_, n_results, _) in enumerate(batch):
+                by_n_results.setdefault(n_results, []).append(idx)
+
+            for n_results, indices in by_n_results.items():
+                results = await chromadb_service.query(
+                    query_embeddings=embeddings[indices],
+                    n_results=n_results
+                )
+                # Split the batched results back into per-query results
+                for result_idx, idx in enumerate(indices):
+                    future = batch[idx][2]
+                    if not future.done():
+                        future.set_result({key: [values[result_idx]] for key, values in results.items()})
+
+        except Exception as e:
+            logger.error(f"Error processing query batch: {e}", exc_info=True)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def close(self):
+        """Stop the batching task and fail any queries still waiting"""
+        tasks = [task for task in (self._worker, *self._batch_tasks) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Query batcher is shutting down"))
+        self._worker = None
+
+
+# Global query batcher instance
+query_batcher = MicroBatcher()
@@ -11,7 +11,8 @@ from .errors import (
     handle_parsing_error,
     create_error_response,
 )
-from .logging_config import setup_logging, get_logger
+from .logging_config import setup_logging, shutdown_logging, get_logger
+from .middleware import ContentSizeLimitMiddleware
 
 __all__ = [
     # Error handling
@@ -21,5 +22,8 @@ __all__ = [
     'create_error_response',
     # Logging
     'setup_logging',
+    'shutdown_logging',
     'get_logger',
+    # Middleware
+    'ContentSizeLimitMiddleware',
 ]
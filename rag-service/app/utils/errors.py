@@ -25,14 +25,15 @@ def handle_chromadb_error(
     Returns:
         Dictionary with error information
     """
-    error_message = f"{operation} failed: {str(error)}"
-    logger.error(error_message, exc_info=True)
+    error_details = str(error)
+    error_message = f"{operation} failed: {error_details}"
+    logger.error("%s", error_message, exc_info=True)
 
     return {
         "error": error_message,
         "error_type": "database",
         "operation": operation,
-        "details": str(error),
+        "details": error_details,
     }
 
 
@@ -50,17 +51,18 @@ def handle_embedding_error(
     Returns:
         Dictionary with error information
     """
-    error_message = f"{operation} failed: {str(error)}"
-    logger.error(error_message, exc_info=True)
+    error_details = str(error)
+    error_message = f"{operation} failed: {error_details}"
+    logger.error("%s", error_message, exc_info=True)
 
     # Check if it's a timeout error
-    error_type = "timeout" if "timeout" in str(error).lower() else "api"
+    error_type = "timeout" if "timeout" in error_details.lower() else "api"
 
     return {
         "error": error_message,
         "error_type": error_type,
         "operation": operation,
-        "details": str(error),
+        "details": error_details,
     }
 
 
@@ -80,19 +82,20 @@ def handle_parsing_error(
     Returns:
         Dictionary with error information
     """
+    error_details = str(error)
     if file_name:
-        error_message = f"{operation} failed for '{file_name}': {str(error)}"
+        error_message = f"{operation} failed for '{file_name}': {error_details}"
     else:
-        error_message = f"{operation} failed: {str(error)}"
+        error_message = f"{operation} failed: {error_details}"
 
-    logger.error(error_message, exc_info=True)
+    logger.error("%s", error_message, exc_info=True)
 
     return {
         "error": error_message,
         "error_type": "parsing",
         "operation": operation,
         "file": file_name,
-        "details": str(error),
+        "details": error_details,
     }
 
 
@@ -145,9 +148,9 @@ def handle_validation_error(
     error_message = f"Validation error for '{field}': {message}"
 
     if value is not None:
-        logger.warning(f"{error_message} (value: {value})")
+        logger.warning("%s (value: %s)", error_message, value)
     else:
-        logger.warning(error_message)
+        logger.warning("%s", error_message)
 
     return {
         "error": error_message,
@@ -5,10 +5,16 @@ Provides consistent logging setup across all RAG service modules,
 with configurable log levels and formatting.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from typing import Optional
 
+# Background listener that writes queued log records, while logging is configured
+_listener: Optional[logging.handlers.QueueListener] = None
+
 
 def setup_logging(
     level: str = "INFO",
@@ -20,6 +26,9 @@ def setup_logging(
     Sets up a consistent logging format and level across all modules.
     Should be called once during application startup.
 
+    Records are handed to a queue and written to stdout by a background
+    thread, so logging calls never block on console I/O.
+
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         format_string: Optional custom format string. If None, uses default.
@@ -35,16 +44,33 @@ def setup_logging(
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
 
+    global _listener
+
     # Convert string level to logging constant
     numeric_level = getattr(logging, level.upper(), logging.INFO)
 
-    # Configure root logger
+    # The stream handler runs on the listener thread; the root logger only
+    # gets a QueueHandler, whose emit is a non-blocking enqueue
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(format_string))
+
+    shutdown_logging()
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    # Configure root logger. The QueueHandler merges the message arguments and
+    # renders any exc_info/stack_info traceback on the logging thread; only the
+    # final format_string (timestamp, logger name, level) is applied on the
+    # listener thread.
     logging.basicConfig(
         level=numeric_level,
-        format=format_string,
+        format="%(message)s",
         handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
+            logging.handlers.QueueHandler(log_queue)
+        ],
+        force=True
     )
 
     # Set specific loggers to different levels if needed
@@ -55,7 +81,29 @@ def setup_logging(
     logging.getLogger("openai").setLevel(logging.WARNING)
 
     logger = logging.getLogger(__name__)
-    logger.info(f"RAG service logging configured with level: {level}")
+    logger.info("RAG service logging configured with level: %s", level)
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued log records and stop the background logging thread.
+
+    The root logger is switched to write directly to the listener's
+    handlers, so records logged afterwards are still emitted.
+    """
+    global _listener
+
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    for handler in listener.handlers:
+        root.addHandler(handler)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -0,0 +1,58 @@
+"""
+ASGI middleware for the RAG service.
+
+Provides request guards that run before FastAPI parses request bodies.
+"""
+
+import logging
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class ContentSizeLimitMiddleware:
+    """
+    Reject requests whose body exceeds a maximum size with 413.
+
+    Requests declaring an oversized Content-Length are rejected before any
+    body bytes are read. Requests without a Content-Length (chunked transfer)
+    are counted as the body streams in and aborted once the limit is passed,
+    so the server never buffers a rogue body in full.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int):
+        self.app = app
+        self.max_size = max_size
+
+    def _error_detail(self) -> str:
+        return f"Request body exceeds maximum allowed size ({self.max_size:,} bytes)"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_size:
+            logger.warning(f"Rejected request to {scope['path']}: Content-Length {content_length} "
+                           f"exceeds {self.max_size} bytes")
+            response = JSONResponse({"detail": self._error_detail()}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(status_code=413, detail=self._error_detail())
+            return message
+
+        await self.app(scope, limited_receive, send)